@@ -1,7 +1,16 @@
 import streamlit as st
+import functools
+import os
 import pickle
+import re
+import sys
 from collections import defaultdict
-from Levenshtein import distance as fast_distance
+from itertools import chain
+
+# rapidfuzz and the optional ahocorasick extension are imported lazily
+# inside the functions that need them (sys.modules caches the module after
+# the first call), so the first Streamlit paint doesn't wait on loading
+# native extensions the user may never exercise before submitting text.
 
 # ============================================================
 # Define Corrector Class (Lightweight version for inference)
@@ -14,72 +23,135 @@ class ImprovedBengaliCorrector:
         # ADDED: Smoothed bigram corrections for contextual lookup
         self.smoothed_bigram_corrections = {} 
         
-        # NOTE: self.word_corrections and self.bigram_corrections (raw counts)
-        # are not needed for inference, so they are kept empty or removed.
         self.accuracy_cons = 0
         self.accuracy_aggr = 0
+        # Length-bucket index over correction_dict keys, built in
+        # load_corrector: length -> list of keys of that length
+        self._len_buckets = {}
+        # Single-codepoint substitutions as a str.translate table (or None),
+        # with the remaining multi-character patterns as one compiled
+        # alternation plus its replacement map
+        self._char_trans = None
+        self._sub_re = None
+        self._sub_map = {}
+        # Aho-Corasick automaton over the multi-char patterns (or None)
+        self._edit_automaton = None
 
     def _apply_edits(self, text):
         corrected = text
-        for typ, old, new in self.edit_patterns:
-            if typ == "sub" and old in corrected:
-                corrected = corrected.replace(old, new)
+        # All single-codepoint substitutions in one C-level translate() pass
+        if self._char_trans is not None:
+            corrected = corrected.translate(self._char_trans)
+
+        if self._edit_automaton is not None:
+            # One automaton pass locates every pattern hit in O(len(text));
+            # apply the leftmost-longest non-overlapping hits in one rebuild
+            # instead of re-scanning the string once per pattern.
+            hits = sorted(
+                ((end - len(old) + 1, old, new)
+                 for end, (old, new) in self._edit_automaton.iter(corrected)),
+                key=lambda hit: (hit[0], -len(hit[1])),
+            )
+            pieces, cursor = [], 0
+            for start, old, new in hits:
+                if start < cursor:
+                    continue
+                pieces.append(corrected[cursor:start])
+                pieces.append(new)
+                cursor = start + len(old)
+            pieces.append(corrected[cursor:])
+            return "".join(pieces)
+
+        if self._sub_re is not None:
+            # One C-level regex pass over the string instead of one
+            # str.replace scan per pattern
+            corrected = self._sub_re.sub(
+                lambda m: self._sub_map[m.group(0)], corrected
+            )
         return corrected
 
+    # Returns (corrected_text, distance): the edit distance the pipeline
+    # already computed between the input and its match, or None when no
+    # distance was needed, so the UI never re-runs a full DP pass just to
+    # render the caption.
+    #
+    # Streamlit reruns the whole script on every widget interaction and
+    # users often resubmit the same text, so memoize the full pipeline.
+    # The corrector instance is held by @st.cache_resource, so its identity
+    # (the default object hash) stays stable across reruns and the cache
+    # remains valid.
+    @functools.lru_cache(maxsize=4096)
     def correct(self, text, aggressive=False):
+        from rapidfuzz import process
+        from rapidfuzz.distance import Levenshtein
+
         text = str(text).strip()
         if not text:
-            return text
+            return text, None
 
         # 1️⃣ Exact match
         if text in self.correction_dict:
-            return self.correction_dict[text]
+            return self.correction_dict[text], None
 
         # 2️⃣ Similar sentence (RELAXED THRESHOLD)
-        best_match, best_distance = None, float("inf")
+        # Edit distance is bounded below by the length difference, so only
+        # keys within +/-4 of the query length can pass the cutoff; gather
+        # just those buckets instead of scanning the whole dictionary.
         text_len = len(text)
-        for inc, cor in list(self.correction_dict.items())[:3000]:
-            if abs(len(inc) - text_len) > 4:
-                continue
-            d = fast_distance(text, inc)
-            
-            # FIX 1a: Relaxed Distance Search (was d <= 3)
-            if d <= 5 and d < best_distance:
-                best_distance, best_match = d, cor
-                
+        candidates = chain.from_iterable(
+            self._len_buckets.get(length, ())
+            for length in range(max(0, text_len - 4), text_len + 5)
+        )
+
+        # process.extractOne scans the candidates inside rapidfuzz's C core
+        # (SIMD dispatch, score_cutoff pruning) instead of a Python loop;
+        # chaining the load-time bucket lists avoids copying them into a
+        # fresh list on every query.
+        result = process.extractOne(
+            text, candidates, scorer=Levenshtein.distance, score_cutoff=5
+        )
+
         # FIX 1b: Relaxed Distance Return (was best_distance <= 2)
-        if best_match and best_distance <= 3:
-            return best_match
+        if result is not None and result[1] <= 3:
+            return self.correction_dict[result[0]], result[1]
 
         # 3️⃣ Word-level correction (WITH SMOOTHED BIGRAMS)
-        words, new_words = text.split(), []
+        # Interned words hit the pointer-compare fast path in the dict probes
+        words, new_words = [sys.intern(w) for w in text.split()], []
         changes = 0
-        for i, w in enumerate(words):
-            corrected = w
-            
+        prev = None
+        for w in words:
             # FIX 2: Check smoothed bigram corrections first
-            if i > 0 and (words[i - 1], w) in self.smoothed_bigram_corrections:
-                corrected = self.smoothed_bigram_corrections[(words[i - 1], w)]
+            corrected = None
+            if prev is not None:
+                corrected = self.smoothed_bigram_corrections.get(prev + " " + w)
             
             # Fall back to reliable single-word corrections (now count >= 1)
-            elif w in self.best_word_corrections:
-                corrected = self.best_word_corrections[w]
+            if corrected is None:
+                corrected = self.best_word_corrections.get(w, w)
             
             if corrected != w:
                 changes += 1
             new_words.append(corrected)
+            prev = w
 
         candidate = " ".join(new_words)
-        if changes > 0 and fast_distance(text, candidate) <= len(text) * 0.3:
-            return candidate
+        # score_cutoff lets rapidfuzz's banded Myers algorithm bail out early
+        # as soon as the distance provably exceeds the acceptance threshold.
+        # The threshold is an integer (distances are integral), computed once.
+        max_edits = int(text_len * 0.3)
+        if changes > 0:
+            d = Levenshtein.distance(text, candidate, score_cutoff=max_edits)
+            if d <= max_edits:
+                return candidate, d
 
         # 4️⃣ Aggressive mode
         if aggressive:
             corrected = self._apply_edits(text)
             if corrected != text:
-                return corrected
+                return corrected, None
 
-        return text
+        return text, None
 
 
 # ============================================================
@@ -87,26 +159,91 @@ class ImprovedBengaliCorrector:
 # ============================================================
 @st.cache_resource
 def load_corrector(model_path="model/simple_corrector.pkl"):
+    # Prefer the msgpack sidecar (written by convert_model.py): decoding
+    # plain maps is several times faster than pickle's opcode interpreter,
+    # which shortens the startup spinner. Fall back to the pickle.
+    data = None
+    msgpack_path = os.path.splitext(model_path)[0] + ".msgpack"
     try:
-        with open(model_path, "rb") as f:
-            data = pickle.load(f)
-    except FileNotFoundError:
-        st.error(f"Error: Model file not found at {model_path}. Please run the training script first.")
-        # Return a dummy corrector to prevent crash
-        return ImprovedBengaliCorrector() 
+        import msgpack
+
+        with open(msgpack_path, "rb") as f:
+            data = msgpack.unpack(f, raw=False, strict_map_key=False)
+    except (ImportError, FileNotFoundError):
+        pass
+
+    if data is None:
+        try:
+            with open(model_path, "rb") as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            st.error(f"Error: Model file not found at {model_path}. Please run the training script first.")
+            # Return a dummy corrector to prevent crash
+            return ImprovedBengaliCorrector() 
 
     corrector = ImprovedBengaliCorrector()
     corrector.correction_dict = data.get("correction_dict", {})
-    # Note: Loading raw word_corrections is not strictly needed for inference, but included for robustness
-    corrector.best_word_corrections = data.get("best_word_corrections", {})
+    # Intern the word-level keys/values once here: step 3 probes these dicts
+    # per word, and interned strings make the hash-table equality check a
+    # pointer compare instead of a character compare.
+    corrector.best_word_corrections = {
+        sys.intern(k): sys.intern(v)
+        for k, v in data.get("best_word_corrections", {}).items()
+    }
     corrector.edit_patterns = data.get("edit_patterns", [])
     
-    # ADDED: Load smoothed bigram corrections
-    corrector.smoothed_bigram_corrections = data.get("smoothed_bigram_corrections", {})
+    # ADDED: Load smoothed bigram corrections (interned like the word dict).
+    # Keys are flattened to "prev cur" strings: hashing one string is cheaper
+    # than hashing a 2-tuple and saves the tuple allocation on every probe.
+    # The pickle stores (prev, cur) tuple keys; the msgpack sidecar stores
+    # them NUL-joined. Both normalize to the flattened "prev cur" form.
+    corrector.smoothed_bigram_corrections = {
+        sys.intern(k.replace("\x00", " ") if isinstance(k, str) else " ".join(k)):
+            sys.intern(v)
+        for k, v in data.get("smoothed_bigram_corrections", {}).items()
+    }
     
     # Load accuracy values for display if they exist
     corrector.accuracy_cons = data.get("accuracy_cons", 0)
     corrector.accuracy_aggr = data.get("accuracy_aggr", 0)
+
+    try:
+        import ahocorasick
+    except ImportError:
+        # Optional accelerator; _apply_edits falls back to the compiled regex
+        ahocorasick = None
+
+    # Partition the substitution patterns: single codepoints collapse into
+    # one str.translate table, only multi-character patterns need scanning.
+    subs = [(old, new) for typ, old, new in corrector.edit_patterns if typ == "sub"]
+    single_char = {ord(old): new for old, new in subs if len(old) == 1}
+    if single_char:
+        corrector._char_trans = str.maketrans(single_char)
+    multi = {old: new for old, new in subs if len(old) > 1}
+    if multi:
+        corrector._sub_map = multi
+        # Longest-first alternation keeps prefer-the-longer-match semantics
+        corrector._sub_re = re.compile(
+            "|".join(re.escape(old) for old in sorted(multi, key=len, reverse=True))
+        )
+
+    # Compile the multi-char patterns into one Aho-Corasick automaton so
+    # aggressive mode walks the text once instead of once per pattern.
+    if ahocorasick is not None and multi:
+        automaton = ahocorasick.Automaton()
+        for old, new in multi.items():
+            automaton.add_word(old, (old, new))
+        automaton.make_automaton()
+        corrector._edit_automaton = automaton
+
+    # Build the length-bucket index once here so the @st.cache_resource'd
+    # corrector keeps it across Streamlit reruns. Keys stay as str on
+    # purpose: rapidfuzz compares code points directly (no per-call UTF-8
+    # encode), and byte-level distances would overcount edits on
+    # multi-byte Bengali characters, skewing the d<=5 cutoff.
+    corrector._len_buckets = defaultdict(list)
+    for key in corrector.correction_dict:
+        corrector._len_buckets[len(key)].append(key)
     return corrector
 
 
@@ -151,8 +288,7 @@ if st.button("🔍 Correct Sentence"):
     if not user_input.strip():
         st.warning("Please enter some text first.")
     else:
-        corrected = corrector.correct(user_input, aggressive=aggressive)
-        dist = fast_distance(user_input, corrected)
+        corrected, dist = corrector.correct(user_input, aggressive=aggressive)
 
         if corrected == user_input:
             st.info("✅ No corrections needed! Your sentence looks perfect.")
@@ -167,7 +303,8 @@ if st.button("🔍 Correct Sentence"):
                 unsafe_allow_html=True,
             )
 
-            st.caption(f"🧮 Edit Distance: {dist}")
+            if dist is not None:
+                st.caption(f"🧮 Edit Distance: {dist}")
 
 # Footer
 st.markdown("---")
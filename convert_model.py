@@ -0,0 +1,35 @@
+"""One-shot converter: model/simple_corrector.pkl -> model/simple_corrector.msgpack
+
+msgpack decodes the model's nested dicts several times faster than
+pickle's opcode interpreter, so app.py prefers the .msgpack sidecar when
+it exists. Tuple bigram keys are not representable as msgpack map keys,
+so they are joined with NUL ("a\x00b") and split again at load time.
+
+Usage: python convert_model.py [model/simple_corrector.pkl]
+"""
+import os
+import pickle
+import sys
+
+import msgpack
+
+
+def main():
+    model_path = sys.argv[1] if len(sys.argv) > 1 else "model/simple_corrector.pkl"
+    with open(model_path, "rb") as f:
+        data = pickle.load(f)
+
+    bigrams = data.get("smoothed_bigram_corrections")
+    if bigrams:
+        data["smoothed_bigram_corrections"] = {
+            "\x00".join(key): value for key, value in bigrams.items()
+        }
+
+    out_path = os.path.splitext(model_path)[0] + ".msgpack"
+    with open(out_path, "wb") as f:
+        msgpack.pack(data, f, use_bin_type=True)
+    print(f"Wrote {out_path}")
+
+
+if __name__ == "__main__":
+    main()